@@ -1,71 +1,232 @@
 # backend/app.py
 
 import os
+import re
+import functools
+import hashlib
+import time
+import socket
 import logging
 import threading
 import webbrowser
-from flask import Flask, send_from_directory
+from flask import Flask, Response, request, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from . import utils
-from .config import SERVER_CONFIG, ROBOT_CONFIG, MOTION_CONFIG, LLM_CONFIG
-from .robot_controller import RobotController
-from .command_parser import CommandParser
-from .routes import api_bp
+from .status_monitor import StatusMonitor
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用 Flask 默认的 json 实现
+    orjson = None
+
+try:
+    from whitenoise import WhiteNoise
+except ImportError:  # 未安装 whitenoise 时由下面的 Flask 视图提供静态文件
+    WhiteNoise = None
+
+try:
+    from waitress import serve
+except ImportError:  # 未安装 waitress 时退回 Flask 自带的开发服务器
+    serve = None
+
+# 前端构建产物目录
+STATIC_DIR = os.path.join(utils.get_project_root(), 'frontend', 'dist')
 
-# --- 日志配置 ---
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - [%(module)s] %(message)s')
 log = logging.getLogger(__name__)
 
-# --- 创建应用实例 ---
-def create_app():
-    project_root = utils.get_project_root()
-    static_dir = os.path.join(project_root, 'frontend', 'dist')
-    
+# --- 日志配置 ---
+def configure_logging():
+    """配置根日志记录器。只在作为程序入口运行时调用，被导入时不修改全局日志设置。"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - [%(module)s] %(message)s')
+
+class OrjsonProvider(DefaultJSONProvider):
+    """使用 orjson 进行 JSON 编解码，jsonify 和 request.get_json 均会经过它。"""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=self.default).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, default=self.default), mimetype=self.mimetype)
+
+# Vite 构建产物的文件名带内容哈希 (如 assets/index-4f9a2c1b.js)，内容不变文件名就不变
+_HASHED_ASSET_RE = re.compile(r'^/assets/.+-[0-9A-Za-z_-]{8}\.\w+$')
+
+# 浏览器和爬虫每次冷启动都会请求的常见文件，不带哈希但很少变化，允许缓存一天
+_WELL_KNOWN_FILES = frozenset({'/favicon.ico', '/robots.txt', '/manifest.webmanifest'})
+
+def cache_control_for(url):
+    """按 URL 决定静态文件的 Cache-Control：哈希资源长期缓存，常见探测文件缓存一天，其余每次重新验证。"""
+    if _HASHED_ASSET_RE.match(url):
+        return 'public, max-age=31536000, immutable'
+    if url in _WELL_KNOWN_FILES:
+        return 'public, max-age=86400'
+    return 'no-cache'
+
+def set_cache_control(headers, path, url):
+    """WhiteNoise 的 add_headers_function，使其与 Flask 视图使用相同的缓存策略。"""
+    headers['Cache-Control'] = cache_control_for(url)
+
+def build_static_manifest(static_dir):
+    """返回 static_dir 下所有文件相对路径 (以 / 分隔) 的集合。"""
+    return frozenset(
+        os.path.relpath(os.path.join(root, name), static_dir).replace(os.sep, '/')
+        for root, _, files in os.walk(static_dir) for name in files
+    )
+
+def send_static_file(static_dir, path):
+    """发送静态文件 (未安装 WhiteNoise 时使用)，缓存策略与 WhiteNoise 一致。"""
+    response = send_from_directory(static_dir, path)
+    response.headers['Cache-Control'] = cache_control_for('/' + path)
+    return response
+
+def load_index_html(static_dir):
+    """读取 index.html 的内容并计算其 ETag；文件不存在时返回 None。"""
+    try:
+        with open(os.path.join(static_dir, 'index.html'), 'rb') as f:
+            body = f.read()
+    except OSError:
+        return None
+    return body, hashlib.md5(body).hexdigest()
+
+def make_index_response(body, etag):
+    """用缓存的 index.html 构造响应；浏览器携带匹配的 If-None-Match 时返回 304。"""
+    response = Response(body, mimetype='text/html')
+    response.set_etag(etag)
+    # index.html 引用带哈希的资源文件，必须每次重新验证，但验证命中时只需一个 304
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def register_frontend(app, static_dir):
+    """注册前端静态文件服务：WhiteNoise (若已安装) 与基于启动清单的 SPA 视图。"""
     # 检查静态文件目录是否存在
     if not os.path.exists(static_dir):
         log.warning(f"前端静态文件目录 '{static_dir}' 不存在。请先运行 'npm run build'。")
         # 在这种情况下，可以只提供API服务，或者优雅地退出
         # 这里我们选择继续运行，但Web界面将无法访问
-    
-    log.info(f"Flask 静态文件目录设置为: {static_dir}")
-    app = Flask(__name__, static_folder=static_dir)
+    log.info(f"前端静态文件目录: {static_dir}")
 
-    # 将配置注入到app.config中，方便路由访问
-    app.config['robot_controller'] = RobotController(ROBOT_CONFIG, MOTION_CONFIG)
-    app.config['command_parser'] = CommandParser(LLM_CONFIG)
-    app.config['SERVER_PORT'] = SERVER_CONFIG.get('port', 5000)
+    # 构建产物在运行期间不会变化：启动时扫描一次，请求时只需集合查找，不再逐个 stat。
+    # .gz/.br 预压缩版本在构建时生成 (见 README)，WhiteNoise 会按 Accept-Encoding 优先发送它们
+    static_dir_exists = os.path.isdir(static_dir)
+    static_files = build_static_manifest(static_dir) if static_dir_exists else frozenset()
 
-    # 注册API蓝图
-    app.register_blueprint(api_bp)
+    if WhiteNoise is not None and static_dir_exists:
+        # WhiteNoise 在启动时扫描 dist 目录并预先确定响应头，静态文件请求不再进入 Flask 视图；
+        # 其余路径 (API 与前端路由) 照常交给 Flask。
+        app.wsgi_app = WhiteNoise(app.wsgi_app, root=static_dir, index_file=True,
+                                  add_headers_function=set_cache_control)
+
+    # index.html 在启动时读入内存并计算 ETag，SPA 回退路径无需每次读盘
+    index_html = load_index_html(static_dir)
 
     # --- Vue前端服务路由 ---
     @app.route('/', defaults={'path': ''})
     @app.route('/<path:path>')
     def serve_vue_app(path):
-        if not app.static_folder or not os.path.exists(app.static_folder):
+        if not static_dir_exists:
              return "前端文件未找到。请确保 'frontend/dist' 目录存在。", 404
 
-        if path != "" and os.path.exists(os.path.join(app.static_folder, path)):
-            return send_from_directory(app.static_folder, path)
+        if path in static_files:
+            return send_static_file(static_dir, path)
         else:
-            index_path = os.path.join(app.static_folder, 'index.html')
-            if not os.path.exists(index_path):
+            if index_html is None:
                 return "应用入口 index.html 未找到。", 404
-            return send_from_directory(app.static_folder, 'index.html')
+            return make_index_response(*index_html)
+
+# --- 创建应用实例 ---
+def create_app(serve_frontend: bool = True):
+    """
+    创建 Flask 应用。serve_frontend=False 时不扫描、不提供前端静态文件
+    (如调试模式下重载器的父进程，它从不处理请求)。
+    同一进程内重复调用返回同一个应用实例 (共享同一个机器人连接与 app.config)；
+    需要全新实例时先调用 create_app.cache_clear()。
+    """
+    # lru_cache 按调用形式区分缓存键：create_app()、create_app(True) 与 create_app(serve_frontend=True)
+    # 会各自创建一个应用。先把参数规范化后再按位置传入，保证同一取值只对应一个实例。
+    return _create_app(bool(serve_frontend))
+
+@functools.lru_cache(maxsize=None)
+def _create_app(serve_frontend: bool):
+    # 配置读取、控制器与路由模块在创建应用时才导入，单纯导入本模块不会读写配置文件
+    from .config import SERVER_CONFIG, ROBOT_CONFIG, MOTION_CONFIG, LLM_CONFIG
+    from .robot_controller import RobotController
+    from .command_parser import CommandParser
+    from .routes import api_bp
+
+    # 静态文件由 WhiteNoise 或 register_frontend 中的视图提供，不注册 Flask 内置的静态路由
+    app = Flask(__name__, static_folder=None)
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+
+    # 将配置注入到app.config中，方便路由访问
+    app.config['robot_controller'] = RobotController(ROBOT_CONFIG, MOTION_CONFIG)
+    app.config['command_parser'] = CommandParser(LLM_CONFIG)
+    app.config['SERVER_PORT'] = SERVER_CONFIG.get('port', 5000)
+    # 单一后台线程轮询机器人状态，供 /api/status 与 /api/events 共享
+    app.config['status_monitor'] = StatusMonitor(lambda: app.config['robot_controller'])
+
+    # 注册API蓝图
+    app.register_blueprint(api_bp)
+
+    # 由 nginx 等反向代理直接提供前端文件时，设置 SERVE_STATIC=0，本进程只提供 API
+    if os.environ.get('SERVE_STATIC', '1') == '1':
+        if serve_frontend:
+            register_frontend(app, STATIC_DIR)
+    else:
+        log.info("SERVE_STATIC=0：前端静态文件由外部服务器提供，本进程只提供 API。")
 
     return app
 
+create_app.cache_clear = _create_app.cache_clear
+
 # --- 启动逻辑 ---
 def open_browser(port):
     """自动打开浏览器"""
     webbrowser.open_new_tab(f"http://127.0.0.1:{port}")
 
+def open_browser_when_ready(port, timeout=10.0):
+    """在后台等待服务器开始接受连接后立即打开浏览器；超时仍未就绪则放弃。"""
+    def wait_and_open():
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.05).close()
+            except OSError:
+                time.sleep(0.01)
+                continue
+            open_browser(port)
+            return
+        log.warning(f"服务器在 {timeout}s 内未就绪，不自动打开浏览器。")
+
+    threading.Thread(target=wait_and_open, name="open-browser", daemon=True).start()
+
 if __name__ == '__main__':
-    app = create_app()
+    configure_logging()
+    debug = os.environ.get('FLASK_DEBUG') == '1'
+    # 调试模式下 Werkzeug 重载器的父进程只负责监视源码并重启子进程，从不处理请求：
+    # 它无需扫描前端文件，也不应再启动一路状态轮询
+    is_reloader_parent = debug and not os.environ.get("WERKZEUG_RUN_MAIN")
+    app = create_app(serve_frontend=not is_reloader_parent)
+    from .config import SERVER_CONFIG
     host = SERVER_CONFIG.get('host', '0.0.0.0')
     port = app.config['SERVER_PORT']
     
     if not os.environ.get("WERKZEUG_RUN_MAIN"):
-        threading.Timer(1.25, open_browser, args=[port]).start()
+        open_browser_when_ready(port)
     
+    if not is_reloader_parent:
+        app.config['status_monitor'].start()
     log.info(f"服务器将在 http://{host}:{port} 上启动...")
-    app.run(host=host, port=port, debug=False)
\ No newline at end of file
+    # waitress 与 Flask 开发服务器 (1.0 起默认 threaded) 都在独立线程中处理每个请求，
+    # HTTP I/O 可与其他请求的 Modbus 通信重叠；Modbus 客户端本身由 RobotController 的锁串行化。
+    if serve is not None and not debug:
+        # 每个订阅 /api/events 的页面会长期占用一个线程，线程数需留有余量
+        serve(app, host=host, port=port, threads=8)
+    else:
+        if not debug:
+            log.warning("未安装 waitress，使用 Flask 开发服务器运行。建议执行 'pip install waitress'。")
+        app.run(host=host, port=port, debug=debug)
\ No newline at end of file
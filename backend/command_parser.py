@@ -1,9 +1,13 @@
 # backend/command_parser.py
 
 import re
+import copy
 import json
+import functools
+import threading
+import unicodedata
+from collections import OrderedDict
 import logging
-from openai import OpenAI, APIStatusError, APIConnectionError, APITimeoutError
 from typing import Dict, Any, List
 
 log = logging.getLogger(__name__)
@@ -120,75 +124,183 @@ LLM_SYSTEM_PROMPT = """
 ```
 """
 
+# 无参数指令的中英文别名 -> 标准指令名
+NO_ARG_COMMAND_ALIASES = {
+    "AUTO_MODE": "AUTO_MODE", "自动模式": "AUTO_MODE",
+    "PAUSE_MOVE": "PAUSE_MOVE", "暂停运动": "PAUSE_MOVE",
+    "CONTINUE_MOVE": "CONTINUE_MOVE", "继续运动": "CONTINUE_MOVE",
+    "STOP_MOVE": "STOP_MOVE", "停止运动": "STOP_MOVE",
+    "GO_HOME_ALL": "GO_HOME_ALL", "全轴回零": "GO_HOME_ALL",
+    "MONITOR": "MONITOR", "状态监控": "MONITOR",
+}
+
+# 所有带参数的严格格式指令合并为一个预编译正则，一次匹配即可确定指令类型；
+# 每个分支外层的命名组即为 lastgroup，用于分派到对应的格式化函数
+STRICT_COMMAND_RE = re.compile(
+    r"^(?:"
+    r"(?P<SET_SPEED>(?:SET_SPEED|设置速度)\s*(?P<speed>[\d\.\-]+)?)"
+    r"|(?P<TEST_WRITE_GV0>(?:TEST_WRITE_GV0|测试写入GV0)\s+(?P<gv0_value>[\d\.\-]+))"
+    r"|(?P<MOVE_JOINT>(?:MOVE|移动)\s+J(?P<joint>\d+)\s+(?P<angle>[\d\.\-]+))"
+    r"|(?P<MOVE_BASE>(?:MOVE|移动)\s+(?P<axis>[XYZABC])\s+(?P<distance>[\d\.\-]+))"
+    r"|(?P<GO_HOME_J>(?:GO_HOME_J|回零 J)(?P<home_joint>\d+))"
+    r")$"
+)
+
+STRICT_COMMAND_FORMATTERS = {
+    "SET_SPEED": lambda m: f"SET_SPEED {m['speed'] or ''}".strip(),
+    "TEST_WRITE_GV0": lambda m: f"TEST_WRITE_GV0 {m['gv0_value']}",
+    "MOVE_JOINT": lambda m: f"MOVE J{m['joint']} {m['angle']}",
+    "MOVE_BASE": lambda m: f"MOVE {m['axis']} {m['distance']}",
+    # 注意：原始代码返回 GO_HOME_J<id>，但为了解析方便，返回 GO_HOME_J <id> 更好
+    "GO_HOME_J": lambda m: f"GO_HOME_J {m['home_joint']}",
+}
+
+@functools.lru_cache(maxsize=2048)
+def normalize_strict_command(command_text: str) -> str:
+    """
+    将单行指令规范化为标准的英文指令格式；无法识别时返回原始大写文本。
+    结果只取决于输入文本，界面按钮和脚本反复发送的同一指令只需匹配一次。
+    """
+    command_text_upper = command_text.strip().upper()
+
+    alias = NO_ARG_COMMAND_ALIASES.get(command_text_upper)
+    if alias:
+        return alias
+
+    match = STRICT_COMMAND_RE.match(command_text_upper)
+    if match:
+        return STRICT_COMMAND_FORMATTERS[match.lastgroup](match)
+
+    return command_text_upper # 返回原始大写文本以示未知
+
+# 系统提示词固定放在消息列表首位且内容不变：DeepSeek / OpenAI 等服务会自动缓存相同的前缀，
+# 后续调用只需处理用户指令部分 (各家兼容接口对 cache_control 扩展支持不一，故不额外标注)
+LLM_SYSTEM_MESSAGE = {"role": "system", "content": LLM_SYSTEM_PROMPT}
+
+# 缓存的LLM解析结果条数上限
+LLM_CACHE_SIZE = 512
+
+def normalize_llm_query(user_query: str) -> str:
+    """LLM 缓存键所用的指令文本：统一 Unicode 形式、大小写，并合并连续空白。"""
+    return " ".join(unicodedata.normalize("NFC", user_query).lower().split())
+
+def _read_json_object_from_stream(stream) -> str:
+    """
+    拼接流式返回的文本片段，顶层 JSON 对象闭合时立即返回 (跳过字符串内的括号)。
+    若流结束时对象仍未闭合，返回已收到的全部文本，由调用方的 json.loads 报错。
+    """
+    parts = []
+    depth = 0
+    in_string = escaped = False
+    try:
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            piece = chunk.choices[0].delta.content
+            if not piece:
+                continue
+            for index, char in enumerate(piece):
+                if in_string:
+                    if escaped:
+                        escaped = False
+                    elif char == '\\':
+                        escaped = True
+                    elif char == '"':
+                        in_string = False
+                elif char == '"':
+                    in_string = True
+                elif char == '{':
+                    depth += 1
+                elif char == '}':
+                    depth -= 1
+                    if depth == 0:
+                        parts.append(piece[:index + 1])
+                        return "".join(parts)
+            parts.append(piece)
+    finally:
+        # 提前返回时关闭连接，不再接收剩余内容
+        close = getattr(stream, "close", None)
+        if close:
+            close()
+    return "".join(parts)
+
 class CommandParser:
     def __init__(self, llm_config: Dict[str, Any]):
-        self.llm_client = None
+        self.llm_config = llm_config
         self.llm_model_name = llm_config.get('model_name')
-        if llm_config.get('api_key'):
-            try:
-                self.llm_client = OpenAI(
-                    api_key=llm_config['api_key'], 
-                    base_url=llm_config.get('api_base_url')
-                )
-                log.info("LLM 客户端初始化成功。")
-            except Exception as e:
-                log.error(f"LLM 客户端初始化失败: {e}")
-        else:
+        # LLM 客户端 (连同 openai 库本身) 在首次需要自然语言解析时才创建，不拖慢应用启动
+        self._llm_client = None
+        self._llm_client_lock = threading.Lock()
+        # 成功的解析结果按 (模型, 规范化后的指令文本) 缓存，重复的指令无需再次调用 LLM
+        self._llm_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._llm_cache_lock = threading.Lock()
+        if not llm_config.get('api_key'):
             log.warning("未配置 LLM API Key，自然语言控制不可用。")
 
+    @property
+    def llm_client(self):
+        """按需创建的 OpenAI 客户端；未配置 API Key 或创建失败时为 None。"""
+        if self._llm_client is None and self.llm_config.get('api_key'):
+            with self._llm_client_lock:
+                if self._llm_client is None:
+                    try:
+                        from openai import OpenAI
+                        self._llm_client = OpenAI(
+                            api_key=self.llm_config['api_key'], 
+                            base_url=self.llm_config.get('api_base_url')
+                        )
+                        log.info("LLM 客户端初始化成功。")
+                    except Exception as e:
+                        log.error(f"LLM 客户端初始化失败: {e}")
+        return self._llm_client
+
     def normalize_strict_command(self, command_text: str) -> str:
         """
         尝试将中文指令或其组合规范化为标准的英文指令格式。
         """
-        command_text_upper = command_text.strip().upper()
-
-        if command_text_upper in ["AUTO_MODE", "自动模式"]: return "AUTO_MODE"
-        if command_text_upper in ["PAUSE_MOVE", "暂停运动"]: return "PAUSE_MOVE"
-        if command_text_upper in ["CONTINUE_MOVE", "继续运动"]: return "CONTINUE_MOVE"
-        if command_text_upper in ["STOP_MOVE", "停止运动"]: return "STOP_MOVE"
-        if command_text_upper in ["GO_HOME_ALL", "全轴回零"]: return "GO_HOME_ALL"
-        if command_text_upper in ["MONITOR", "状态监控"]: return "MONITOR"
-
-        match_speed = re.match(r"^(SET_SPEED|设置速度)\s*([\d\.\-]+)?$", command_text_upper)
-        if match_speed:
-            return f"SET_SPEED {match_speed.group(2) or ''}".strip()
-
-        match_test_gv0 = re.match(r"^(TEST_WRITE_GV0|测试写入GV0)\s+([\d\.\-]+)$", command_text_upper)
-        if match_test_gv0:
-            return f"TEST_WRITE_GV0 {match_test_gv0.group(2)}"
-
-        match_move_joint = re.match(r"^(MOVE|移动)\s+J(\d+)\s+([\d\.\-]+)$", command_text_upper)
-        if match_move_joint:
-            return f"MOVE J{match_move_joint.group(2)} {match_move_joint.group(3)}"
-
-        match_move_base = re.match(r"^(MOVE|移动)\s+([XYZABC])\s+([\d\.\-]+)$", command_text_upper)
-        if match_move_base:
-            return f"MOVE {match_move_base.group(2)} {match_move_base.group(3)}"
-    
-        match_home_joint = re.match(r"^(GO_HOME_J|回零 J)(\d+)$", command_text_upper)
-        if match_home_joint:
-            # 注意：原始代码返回 GO_HOME_J<id>，但为了解析方便，返回 GO_HOME_J <id> 更好
-            return f"GO_HOME_J {match_home_joint.group(2)}"
-
-        return command_text_upper # 返回原始大写文本以示未知
+        return normalize_strict_command(command_text)
 
     def parse_with_llm(self, user_query: str) -> Dict[str, Any]:
-        """使用LLM解析自然语言指令。"""
-        if not self.llm_client:
+        """使用LLM解析自然语言指令；相同的指令命中缓存时直接返回上次的成功结果。"""
+        cache_key = (self.llm_model_name, normalize_llm_query(user_query))
+        with self._llm_cache_lock:
+            cached = self._llm_cache.get(cache_key)
+            if cached is not None:
+                self._llm_cache.move_to_end(cache_key)
+        if cached is not None:
+            log.info("LLM 解析命中缓存。")
+            return copy.deepcopy(cached)
+
+        result = self._call_llm(user_query)
+        if not result.get("error"):
+            with self._llm_cache_lock:
+                self._llm_cache[cache_key] = copy.deepcopy(result)
+                if len(self._llm_cache) > LLM_CACHE_SIZE:
+                    self._llm_cache.popitem(last=False)
+        return result
+
+    def _call_llm(self, user_query: str) -> Dict[str, Any]:
+        """调用LLM API解析自然语言指令。"""
+        response_content = None
+        llm_client = self.llm_client
+        if not llm_client:
             return {"commands": [], "error": "LLM_NOT_CONFIGURED", "message": "LLM服务未配置。"}
         if not self.llm_model_name:
             return {"commands": [], "error": "LLM_MODEL_NOT_CONFIGURED", "message": "LLM模型名称未配置。"}
+        from openai import APIStatusError, APIConnectionError, APITimeoutError
 
-        messages = [{"role": "system", "content": LLM_SYSTEM_PROMPT}, {"role": "user", "content": user_query}]
+        messages = [LLM_SYSTEM_MESSAGE, {"role": "user", "content": user_query}]
         
         try:
-            log.info(f"调用 LLM API 解析: '{user_query[:50]}...'")
-            chat_completion = self.llm_client.chat.completions.create(
+            log.info("调用 LLM API 解析: '%.50s...'", user_query)
+            # 流式接收：顶层 JSON 对象闭合后即停止读取，不再等待结尾的空白和统计块
+            stream = llm_client.chat.completions.create(
                 model=self.llm_model_name,
                 messages=messages,
-                response_format={"type": "json_object"}
+                response_format={"type": "json_object"},
+                stream=True
             )
-            response_content = chat_completion.choices[0].message.content
+            response_content = _read_json_object_from_stream(stream)
             parsed_output = json.loads(response_content)
             if "commands" not in parsed_output or not isinstance(parsed_output["commands"], list):
                 raise ValueError("LLM返回的JSON结构不符合预期")
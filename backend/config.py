@@ -1,5 +1,7 @@
 # backend/config.py (全新版本)
 
+import copy
+import functools
 import json
 import os
 import sys
@@ -14,8 +16,9 @@ APP_NAME = "TextBasedRobotControl"
 APP_AUTHOR = "Xicheng2003" 
 
 # --- 关键函数：获取用户专属的配置文件路径 ---
+@functools.lru_cache(maxsize=None)
 def get_user_config_path():
-    """获取用户数据目录下的配置文件路径，如果目录不存在则创建。"""
+    """获取用户数据目录下的配置文件路径，如果目录不存在则创建 (只在首次调用时解析和创建)。"""
     data_dir = user_data_dir(APP_NAME, APP_AUTHOR)
     # 确保这个目录存在
     os.makedirs(data_dir, exist_ok=True)
@@ -36,6 +39,9 @@ def get_bundled_resource_path(relative_path):
         project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         return os.path.join(project_root, relative_path)
 
+# 已解析配置的进程内缓存: {'key': (mtime_ns, size), 'data': dict}
+_config_cache = {}
+
 # --- 重写 load_config 函数 ---
 def load_config():
     """
@@ -56,8 +62,16 @@ def load_config():
             sys.exit(1)
 
     try:
+        # 以文件的修改时间和大小作为缓存键，文件未变化时直接返回已解析结果的副本
+        stat = os.stat(user_config_file)
+        cache_key = (stat.st_mtime_ns, stat.st_size)
+        if _config_cache.get('key') == cache_key:
+            return copy.deepcopy(_config_cache['data'])
+
         with open(user_config_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            data = json.load(f)
+        _config_cache.update(key=cache_key, data=data)
+        return copy.deepcopy(data)
     except json.JSONDecodeError as e:
         log.critical(f"用户配置文件 '{user_config_file}' 格式错误: {e}。程序退出。")
         sys.exit(1)
@@ -74,12 +88,25 @@ def save_config(new_config_data):
     user_config_file = get_user_config_path()
     log.info(f"正在向用户专属路径写入配置文件: {user_config_file}")
 
+    # 先完整写入同目录下的临时文件，再原子替换：写入中途出错或断电时原配置保持完好
+    temp_file = user_config_file + ".tmp"
     try:
-        with open(user_config_file, 'w', encoding='utf-8') as f:
+        with open(temp_file, 'w', encoding='utf-8') as f:
             json.dump(new_config_data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, user_config_file)
+        # 以新文件的状态为键直接缓存刚写入的数据，随后的 load_config 无需重新读取和解析
+        stat = os.stat(user_config_file)
+        _config_cache.update(key=(stat.st_mtime_ns, stat.st_size), data=copy.deepcopy(new_config_data))
         return True, None
-    except IOError as e:
+    except (IOError, TypeError, ValueError) as e:
+        _config_cache.clear()
         log.error(f"无法写入用户配置文件 '{user_config_file}': {e}")
+        try:
+            os.remove(temp_file)
+        except OSError:
+            pass
         return False, str(e)
 
 
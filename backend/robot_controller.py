@@ -1,69 +1,299 @@
 # backend/robot_controller.py
 
 import logging
+import socket
+import struct
+import threading
 import time
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Sequence, Tuple
 from pymodbus.client import ModbusTcpClient
-from pymodbus.exceptions import ModbusException
+from pymodbus.exceptions import ModbusException, ConnectionException, ModbusIOException
 from . import utils
 
 log = logging.getLogger(__name__)
 
+# 单次 read_holding_registers 可读取的最大寄存器数量 (Modbus 协议限制)
+MAX_READ_REGISTERS = 125
+
+# 单次 write_registers 可写入的最大寄存器数量 (Modbus 协议限制)
+MAX_WRITE_REGISTERS = 123
+# 轨迹点位暂存在 GV0~GV99 通用全局变量中，每个点 (XYZABC) 占 6 个全局变量
+MAX_TRAJECTORY_POINTS = 16
+
+# GV245 (490~491) 工具坐标系ID：200 表示不使用工具坐标系，N 表示第 N+1 个工具坐标系。
+# 轨迹点位与临时点运动均以法兰 (不带工具) 的基坐标位姿下发。
+NO_TOOL_FRAME = 200
+# GV291 (582~583) 命令返回状态：0 为初始值，0xff 为执行成功，其余为错误码
+COMMAND_PENDING = 0
+COMMAND_SUCCESS = 0xFF
+# 创建临时点后等待命令返回状态的最长时间 (秒)
+COMMAND_FEEDBACK_TIMEOUT = 2.0
+
+# 基坐标轴名 -> 偏移量序号 (GV200~GV205)
+BASE_AXIS_INDEX = {'X': 0, 'Y': 1, 'Z': 2, 'A': 3, 'B': 4, 'C': 5}
+
+# 六个轴偏移量全为 0.0 时 GV200~GV205 (400~411) 的寄存器值
+ZERO_OFFSET_REGISTERS = tuple(utils.floats_to_modbus_registers([0.0] * 6))
+
+# 等待运动完成时的首次查询间隔 (秒)，此后逐次翻倍
+MIN_POLL_INTERVAL = 0.05
+
+# 状态读取结果在多少秒内可被并发请求直接复用
+STATUS_CACHE_SECONDS = 0.2
+
+# 模式寄存器 (560) 与运行状态寄存器 (561) 的取值含义
+MODE_NAMES = {0: "手动模式", 1: "自动模式", 2: "Modbus示教使能"}
+RUN_STATUS_NAMES = {0: "停止", 1: "正在运行", 2: "暂停"}
+
+# 报警寄存器 (562) 各位的含义
+ALARM_BITS = [(1, "急停报警"), (2, "伺服报警"), (4, "刹车异常"), (8, "算法报警"), (16, "编码器角度报警")]
+ALARM_MASK = 0x1F
+# 预先计算所有位组合对应的报警描述，状态轮询时只需一次查表
+ALARM_DESCRIPTIONS = {code: ", ".join(name for bit, name in ALARM_BITS if code & bit) for code in range(ALARM_MASK + 1)}
+
 class RobotController:
     """封装与机器人通过Modbus TCP的所有交互。"""
     def __init__(self, robot_config: Dict, motion_config: Dict):
         self.host = robot_config.get('ip')
         self.port = robot_config.get('port', 502)
         self.slave_id = robot_config.get('slave_id', 1)
-        self.client: Optional[ModbusTcpClient] = None
-        self.current_speed_setting = float(motion_config.get('default_speed', 100.0))
+        # 客户端在整个控制器生命周期内只创建一次，断线后复用同一实例重连，
+        # 避免每次重连都重新构造客户端和帧解析器。
+        self.client: ModbusTcpClient = ModbusTcpClient(host=self.host, port=self.port, timeout=3)
+        self.default_speed = float(motion_config.get('default_speed', 100.0))
+        self.current_speed_setting = self.default_speed
+        # 当前连接上最近一次成功写入 GV225 的速度；重连后置空，确保新连接上会重新写入
+        self._written_speed: Optional[float] = None
+        # 最近一次完整状态读取的 (时间戳, 状态)，供并发的状态查询共享
+        self._last_status: Optional[Tuple[float, Dict[str, Any]]] = None
+        # 同步客户端不是线程安全的，且Modbus同一连接上同时只能有一个请求在途。
+        # 使用可重入锁，以便多步操作（如增量运动）可以整体持锁。
+        self.lock = threading.RLock()
+        # 流水线读取所用的事务ID；控制器不支持流水线时置为 False，此后改为逐个读取
+        self._pipeline_transaction_id = 0
+        self._pipelining_supported = True
+        # 最近一次连接尝试是否失败，用于断线期间避免重复记录错误日志
+        self._connect_failing = False
+        # close() 之后为 True：控制器已被替换，connect() 不再重新建立连接
+        self._closed = False
 
     def connect(self) -> bool:
-        if self.client and self.client.is_socket_open():
-            return True
-        log.info(f"尝试连接到机器人 Modbus TCP 从站 {self.host}:{self.port}...")
-        try:
-            # 设置合理的超时时间
-            self.client = ModbusTcpClient(host=self.host, port=self.port, timeout=3)
-            if self.client.connect():
-                log.info(f"成功连接到机器人，Unit ID: {self.slave_id}。")
+        with self.lock:
+            if self._closed:
+                log.warning("控制器已关闭 (配置已更新)，不再重新连接。")
+                return False
+            if self.client.is_socket_open():
                 return True
-            else:
-                self.client = None
-                log.error("Modbus连接失败。")
+            # 同一次断线期间只在首次失败时记录错误，之后的重连尝试只记调试日志
+            log_failure = log.debug if self._connect_failing else log.error
+            if not self._connect_failing:
+                log.info(f"尝试连接到机器人 Modbus TCP 从站 {self.host}:{self.port}...")
+            try:
+                if self.client.connect():
+                    utils.enable_tcp_nodelay(self.client.socket)
+                    utils.enable_tcp_keepalive(self.client.socket)
+                    self._written_speed = None
+                    self._connect_failing = False
+                    log.info(f"成功连接到机器人，Unit ID: {self.slave_id}。")
+                    return True
+                else:
+                    log_failure("Modbus连接失败。")
+                    self._connect_failing = True
+                    return False
+            except Exception as e:
+                self.client.close()
+                log_failure("连接过程中发生未知错误: %s", e, exc_info=not self._connect_failing)
+                self._connect_failing = True
                 return False
-        except Exception as e:
-            self.client = None
-            log.error(f"连接过程中发生未知错误: {e}", exc_info=True)
-            return False
+
+    def uses_connection(self, robot_config: Dict) -> bool:
+        """判断新的机器人配置是否仍指向本控制器当前的从站 (IP、端口、Unit ID 均未变化)。"""
+        return (robot_config.get('ip'), robot_config.get('port', 502), robot_config.get('slave_id', 1)) == \
+            (self.host, self.port, self.slave_id)
+
+    def apply_motion_config(self, motion_config: Dict) -> None:
+        """原地应用新的运动配置，与重新创建控制器时一样将当前速度恢复为默认速度。"""
+        with self.lock:
+            self.default_speed = float(motion_config.get('default_speed', 100.0))
+            self.current_speed_setting = self.default_speed
+
+    def close(self) -> None:
+        """
+        关闭连接并停用本控制器。配置更新后旧控制器可能仍被进行中的请求持有，
+        此后这些请求的 connect() 会直接失败，而不是在被丢弃的控制器上重新打开一个连接。
+        """
+        with self.lock:
+            self._closed = True
+            self.client.close()
+
+    def _request_with_reconnect(self, request, op_name, retry: bool = True):
+        """
+        执行一次Modbus请求；若连接已失效（如被对端或NAT静默断开），关闭连接，
+        retry=True 时重连后重试一次。写请求必须传 retry=False：超时并不代表控制器没有收到请求，
+        重发触发类写入 (440~445) 会使同一动作执行两次。
+        """
+        with self.lock:
+            # 连接已关闭时先经由 connect() 重新建立，不让 pymodbus 在请求内部自行重连：
+            # 那样建立的新套接字既不会设置 NODELAY/keep-alive，也不会清空 _written_speed
+            if not self.connect():
+                raise ConnectionException(f"{op_name}: 无法连接到机器人")
+            try:
+                result = request()
+                # 同步客户端在套接字读写出错时不抛异常，而是返回 ModbusIOException
+                if not isinstance(result, ModbusIOException):
+                    return result
+                error = result
+            except (ConnectionException, OSError) as e:
+                error = e
+            self.client.close()
+            if not retry:
+                log.warning("%s 连接异常: %s，控制器可能已收到该请求，不自动重发。", op_name, error)
+                raise error if isinstance(error, ModbusException) else ConnectionException(str(error))
+            log.warning("%s 连接异常: %s，尝试重连后重试一次...", op_name, error)
+            if not self.connect():
+                raise error if isinstance(error, ModbusException) else ConnectionException(str(error))
+            return request()
 
     def _execute_read(self, address, count, op_name) -> Optional[List[int]]:
         try:
-            result = self.client.read_holding_registers(address=address, count=count, slave=self.slave_id)
+            result = self._request_with_reconnect(
+                lambda: self.client.read_holding_registers(address=address, count=count, slave=self.slave_id), op_name)
             if utils.is_modbus_response_ok(result):
                 return result.registers
-            log.error(f"{op_name} 失败. Modbus响应: {result}")
+            log.error("%s 失败 (地址: %s, 数量: %s). Modbus响应: %s", op_name, address, count, result)
             return None
         except (ModbusException, ConnectionRefusedError) as e:
-            log.error(f"{op_name} Modbus异常: {e}")
+            # 断线期间 connect() 已记录过连接失败，状态轮询的每次读取不再重复记录错误
+            (log.debug if self._connect_failing else log.error)("%s Modbus异常: %s", op_name, e)
             self.client.close() # 连接出问题，关闭它
             return None
 
-    def _execute_write(self, address, values, op_name) -> bool:
-        try:
-            if isinstance(values, list):
-                result = self.client.write_registers(address, values, slave=self.slave_id)
+    def _read_ranges(self, ranges: List[Tuple[int, int]], op_name) -> List[Optional[List[int]]]:
+        """
+        按 (起始地址, 数量) 批量读取多个寄存器区间。相邻或重叠的区间会被合并为
+        一次读取（单次不超过 Modbus 的 125 个寄存器上限），结果按传入顺序返回，
+        读取失败的区间对应 None。
+        """
+        blocks: List[List[int]] = []  # [start, end)
+        for start, count in sorted(ranges):
+            end = start + count
+            if blocks and start <= blocks[-1][1] and end - blocks[-1][0] <= MAX_READ_REGISTERS:
+                blocks[-1][1] = max(blocks[-1][1], end)
             else:
-                result = self.client.write_register(address, values, slave=self.slave_id)
-            
-            if not utils.is_modbus_response_ok(result):
-                log.error(f"{op_name} 失败. Modbus响应: {result}")
+                blocks.append([start, end])
+
+        block_data = self._pipelined_read([(start, end - start) for start, end in blocks])
+        if block_data is None:
+            block_data = []
+            for start, end in blocks:
+                # 前一个区间读取失败并断开了连接时，其余区间不再逐个尝试重连 (每次最长等待连接超时)
+                if block_data and block_data[-1] is None and not self.client.is_socket_open():
+                    block_data.append(None)
+                else:
+                    block_data.append(self._execute_read(start, end - start, op_name))
+        block_regs = [(start, data) for (start, _), data in zip(blocks, block_data)]
+
+        results: List[Optional[List[int]]] = []
+        for start, count in ranges:
+            regs = None
+            for block_start, data in block_regs:
+                if data is not None and block_start <= start and start + count <= block_start + len(data):
+                    offset = start - block_start
+                    regs = data[offset:offset + count]
+                    break
+            results.append(regs)
+        return results
+
+    def _pipelined_read(self, ranges: List[Tuple[int, int]]) -> Optional[List[Optional[List[int]]]]:
+        """
+        在同一TCP连接上连续发出多个读请求，再按 MBAP 事务ID 依次取回响应，
+        N 次读取只需约一个往返时间。少于两个区间、未连接或控制器不支持时返回 None，
+        由调用方退回逐个读取。
+        """
+        if len(ranges) < 2 or not self._pipelining_supported:
+            return None
+        with self.lock:
+            sock = self.client.socket
+            if sock is None:
+                return None
+            pending = {}
+            frames = []
+            for index, (address, count) in enumerate(ranges):
+                self._pipeline_transaction_id = (self._pipeline_transaction_id + 1) & 0xFFFF
+                pending[self._pipeline_transaction_id] = index
+                frames.append(utils.build_read_holding_registers_frame(
+                    self._pipeline_transaction_id, self.slave_id, address, count))
+
+            results: List[Optional[List[int]]] = [None] * len(ranges)
+            try:
+                # pymodbus 在收发后可能把套接字置为非阻塞，这里按客户端超时以阻塞方式读取
+                previous_timeout = sock.gettimeout()
+                sock.settimeout(self.client.comm_params.timeout_connect)
+                try:
+                    sock.sendall(b''.join(frames))
+                    while pending:
+                        transaction_id, _, length, _ = utils.MBAP_HEADER.unpack(utils.recv_exact(sock, utils.MBAP_HEADER.size))
+                        pdu = utils.recv_exact(sock, length - 1)
+                        if transaction_id not in pending:
+                            raise ValueError(f"收到未知事务ID {transaction_id} 的响应")
+                        results[pending.pop(transaction_id)] = utils.parse_read_holding_registers_pdu(pdu)
+                finally:
+                    sock.settimeout(previous_timeout)
+            except (ValueError, struct.error) as e:
+                # 响应与请求对不上：控制器不支持流水线，此后改为逐个读取
+                log.warning("流水线读取失败 (%s)，此后改为逐个读取。", e)
+                self._pipelining_supported = False
+                # 连接中可能残留未读取的响应，关闭后由下一次请求重新建立
+                self.client.close()
+                return None
+            except socket.timeout as e:
+                if len(pending) < len(ranges):
+                    # 已收到部分响应、其余的却迟迟不到：控制器每次只处理一帧请求，多余的请求被丢弃。
+                    # 此后改为逐个读取；未收到的请求不会再有响应，连接可以继续使用。
+                    log.warning("流水线读取只收到 %d/%d 个响应，控制器不支持流水线，此后改为逐个读取。",
+                                len(ranges) - len(pending), len(ranges))
+                    self._pipelining_supported = False
+                    return None
+                log.warning("流水线读取时连接异常 (%s)，本次改为逐个读取。", e)
+                self.client.close()
+                return None
+            except OSError as e:
+                # 连接断开或未收到任何响应属于网络问题，不代表控制器不支持流水线：本次退回逐个读取 (会自动重连)
+                log.warning("流水线读取时连接异常 (%s)，本次改为逐个读取。", e)
+                self.client.close()
+                return None
+            return results
+
+    def _execute_write(self, address, values, op_name) -> bool:
+        if isinstance(values, list):
+            request = lambda: self.client.write_registers(address, values, slave=self.slave_id)
+        else:
+            request = lambda: self.client.write_register(address, values, slave=self.slave_id)
+        with self.lock:
+            # 任何写操作都可能改变机器人状态：缓存的状态标记为过期，之后的 get_status 会重新读取，
+            # 但仍保留其内容，供非阻塞查询在连接被占用时返回。
+            # 在锁内进行，避免与 get_status 的读取-写回交错而把写入前读到的状态重新当作新鲜结果。
+            if self._last_status is not None:
+                self._last_status = (float('-inf'), self._last_status[1])
+            try:
+                result = self._request_with_reconnect(request, op_name, retry=False)
+
+                if not utils.is_modbus_response_ok(result):
+                    log.error("%s 失败 (地址: %s, 值: %s). Modbus响应: %s", op_name, address, values, result)
+                    return False
+                return True
+            except (ModbusException, ConnectionRefusedError) as e:
+                log.error("%s Modbus异常: %s", op_name, e)
+                self.client.close()
                 return False
-            return True
-        except (ModbusException, ConnectionRefusedError) as e:
-            log.error(f"{op_name} Modbus异常: {e}")
-            self.client.close()
-            return False
+
+    def _execute_write_chunked(self, address, values: List[int], op_name) -> bool:
+        """按协议上限分帧写入较长的寄存器序列；每帧取偶数个寄存器，避免把一个浮点数拆到两帧中。"""
+        chunk_size = MAX_WRITE_REGISTERS - MAX_WRITE_REGISTERS % 2
+        for offset in range(0, len(values), chunk_size):
+            if not self._execute_write(address + offset, values[offset:offset + chunk_size], op_name):
+                return False
+        return True
 
     # --- 高层API ---
     def set_auto_mode(self) -> bool:
@@ -72,26 +302,127 @@ class RobotController:
     def set_speed(self, speed: float) -> bool:
         self.current_speed_setting = float(speed)
         registers = utils.float_to_modbus_registers(self.current_speed_setting)
-        return self._execute_write(450, registers, f"设置速度为 {speed}")
+        success = self._execute_write(450, registers, "设置速度")
+        self._written_speed = self.current_speed_setting if success else None
+        return success
 
-    def start_incremental_move(self, offsets: Dict, coordinate_type: str) -> bool:
-        # 确保速度已设置
-        self.set_speed(self.current_speed_setting)
-        
-        all_offsets = [0.0] * 6
-        axis_map = {'X': 0, 'Y': 1, 'Z': 2, 'A': 3, 'B': 4, 'C': 5}
+    def _ensure_speed(self, speed: Optional[float] = None) -> bool:
+        """
+        运动前确保控制器的期望速度 (GV225) 为目标值（默认为当前速度设置）。
+        若本连接上已写入相同的值，则省去这次写操作。
+        """
+        target = self.current_speed_setting if speed is None else float(speed)
+        if target == self._written_speed:
+            self.current_speed_setting = target
+            return True
+        return self.set_speed(target)
+
+    def start_incremental_move(self, offsets: Dict, coordinate_type: str, speed: Optional[float] = None) -> bool:
+        """
+        写入速度与增量偏移量并触发运动。若提供 speed，则同时将其设为当前速度，
+        这样“设速度+移动+启动”只需一次调用、在同一持锁窗口内连续发出。
+        """
+        # 通常只有一个轴有偏移量：从全零寄存器出发，只填入该轴的两个寄存器 (转换结果有缓存)
+        registers = list(ZERO_OFFSET_REGISTERS)
         for key, value in offsets.items():
             if isinstance(key, int) and 1 <= key <= 6:
-                all_offsets[key - 1] = float(value)
-            elif isinstance(key, str) and key.upper() in axis_map:
-                all_offsets[axis_map[key.upper()]] = float(value)
-        
-        registers = [reg for val in all_offsets for reg in utils.float_to_modbus_registers(val)]
-        if not self._execute_write(400, registers, "设置增量运动偏移量"):
+                index = key - 1
+            elif isinstance(key, str) and key.upper() in BASE_AXIS_INDEX:
+                index = BASE_AXIS_INDEX[key.upper()]
+            else:
+                # 忽略未知的轴会下发全零偏移量并照常触发运动，只能等到运动超时才发现
+                log.error(f"无效的轴: {key}")
+                return False
+            registers[2 * index:2 * index + 2] = utils.float_to_modbus_registers(value)
+
+        # 整个“设速度-写偏移-触发”序列持锁执行，避免其他请求在中间插入写操作
+        with self.lock:
+            # 确保速度已设置
+            if not self._ensure_speed(speed):
+                return False
+
+            if not self._execute_write(400, registers, "设置增量运动偏移量"):
+                return False
+
+            move_code = 0x40 if coordinate_type == 'joint' else 0x41
+            return self._execute_write(440, move_code, f"启动{coordinate_type}增量运动")
+
+    def upload_trajectory(self, poses: Sequence[Sequence[float]]) -> bool:
+        """
+        将一组基坐标位姿 (XYZABC) 作为临时点 1..N 下发给控制器。
+        所有点位先通过批量写入一次性存入 GV0 起的通用全局变量，之后每个点只需一次参数写入
+        和一次创建指令，并在创建后确认控制器的命令返回状态 (GV291)。
+        注意: 点位数据会覆盖 GV0~GV(6N-1)，其中包括 TEST_WRITE_GV0 使用的 GV0 测试值。
+        """
+        if not poses or len(poses) > MAX_TRAJECTORY_POINTS:
+            log.error(f"轨迹点数量必须在 1~{MAX_TRAJECTORY_POINTS} 之间，收到 {len(poses)} 个。")
+            return False
+        if any(len(pose) != 6 for pose in poses):
+            log.error("每个轨迹点必须包含 X, Y, Z, A, B, C 六个值。")
             return False
 
-        move_code = 0x40 if coordinate_type == 'joint' else 0x41
-        return self._execute_write(440, move_code, f"启动{coordinate_type}增量运动")
+        with self.lock:
+            log.info(f"写入 {len(poses)} 个轨迹点，将覆盖 GV0~GV{len(poses) * 6 - 1} 的原有值。")
+            registers = utils.floats_to_modbus_registers([float(v) for pose in poses for v in pose])
+            if not self._execute_write_chunked(0, registers, "写入轨迹点位"):
+                return False
+            if not self._select_tool_frame(NO_TOOL_FRAME):
+                return False
+            for index in range(len(poses)):
+                point_id = index + 1
+                # GV200=临时点ID, GV201=1 (以全局变量数据创建), GV202=全局变量起始序号
+                params = utils.floats_to_modbus_registers([point_id, 1, index * 6])
+                if not self._execute_write(400, params, f"设置临时点{point_id}参数"):
+                    return False
+                # 先把 GV291 清零：否则上一个点 (或上一次上传) 留下的 0xff 会被当作本次创建成功
+                if not self._execute_write(582, [COMMAND_PENDING, COMMAND_PENDING], f"清零临时点{point_id}命令返回状态"):
+                    return False
+                if not self._execute_write(440, 0xE0, f"创建临时点{point_id}"):
+                    return False
+                if not self._wait_for_command_feedback(f"创建临时点{point_id}"):
+                    return False
+        return True
+
+    def _select_tool_frame(self, tool_frame: int) -> bool:
+        """设置 GV245 工具坐标系ID；创建临时点和运动至临时点前都需要显式指定。"""
+        registers = utils.floats_to_modbus_registers([tool_frame])
+        return self._execute_write(490, registers, f"选择工具坐标系 (GV245={tool_frame})")
+
+    def _wait_for_command_feedback(self, op_name, timeout=COMMAND_FEEDBACK_TIMEOUT) -> bool:
+        """
+        轮询 GV291 (582~583) 命令返回状态，直到控制器给出结果。
+        0xff 表示成功；其余非 0 值为错误码 (如创建临时点时 1 表示临时点ID错误)。
+        """
+        start_time = time.time()
+        delay = MIN_POLL_INTERVAL
+        while True:
+            regs = self._execute_read(582, 2, f"{op_name} 查询命令返回状态")
+            if regs is None:
+                return False
+            code = int(utils.modbus_registers_to_float(regs))
+            if code == COMMAND_SUCCESS:
+                return True
+            if code != COMMAND_PENDING:
+                log.error("%s 失败，命令返回状态: %s", op_name, code)
+                return False
+            if time.time() - start_time >= timeout:
+                log.error("%s 超时 (%ss) 未收到命令返回状态。", op_name, timeout)
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    def move_to_temp_point(self, point_id: int, speed: Optional[float] = None) -> bool:
+        """以直线运动至指定临时点。"""
+        with self.lock:
+            if not self._ensure_speed(speed):
+                return False
+            # GV200=-1 直线运动, GV201=终点临时点ID, GV202=1 姿态随轨迹变化
+            params = utils.floats_to_modbus_registers([-1, point_id, 1])
+            if not self._execute_write(400, params, f"设置运动至临时点{point_id}参数"):
+                return False
+            if not self._select_tool_frame(NO_TOOL_FRAME):
+                return False
+            return self._execute_write(440, 0x42, f"启动运动至临时点{point_id}")
 
     def go_home(self, axis_id: Optional[int] = None) -> bool:
         if axis_id:
@@ -107,67 +438,102 @@ class RobotController:
     def stop_move(self) -> bool: return self._execute_write(441, 0x01, "停止运动")
     def write_gv0_test(self, value: float) -> bool:
         registers = utils.float_to_modbus_registers(float(value))
-        return self._execute_write(0, registers, f"写入GV0测试值 {value}")
+        return self._execute_write(0, registers, "写入GV0测试值")
 
-    def get_status(self) -> Optional[Dict[str, Any]]:
-        if not self.connect(): return None
-        
-        # 批量读取以提高效率
-        status_regs = self._execute_read(560, 3, "读取状态寄存器")
-        gv0_regs = self._execute_read(0, 2, "读取GV0")
+    def get_status(self, max_age: float = STATUS_CACHE_SECONDS) -> Optional[Dict[str, Any]]:
+        """
+        获取机器人状态。多个请求并发轮询时，后到的请求在锁上等待后直接复用
+        max_age 秒内刚读到的结果，而不是各自再发一轮Modbus读取。
+        """
+        with self.lock:
+            cached = self._last_status
+            if cached is not None and time.monotonic() - cached[0] <= max_age:
+                return dict(cached[1])
+            return self._read_status()
+
+    def poll_status(self) -> Optional[Tuple[float, Optional[Dict[str, Any]]]]:
+        """
+        供后台监视线程使用的非阻塞状态查询，返回 (读取时刻, 状态)，读取失败时状态为 None。
+        其他线程正占用连接 (如正在下发运动指令或上传轨迹) 时不排队等待，直接返回 None：
+        此时缓存的状态可能已被写操作标记为过期，不能当作新读到的结果。
+        """
+        if not self.lock.acquire(blocking=False):
+            return None
+        try:
+            status = self.get_status()
+            # 复用缓存时返回缓存的读取时刻，而不是当前时刻
+            read_at = self._last_status[0] if status is not None else time.monotonic()
+            return read_at, status
+        finally:
+            self.lock.release()
+
+    def _read_status(self) -> Optional[Dict[str, Any]]:
+        """读取并解析状态寄存器；连接已断开时由各次读取经 connect() 重新建立。"""
+        # 批量读取以提高效率：状态块 560~562 与 GV0 (0~1)
+        status_regs, gv0_regs = self._read_ranges([(560, 3), (0, 2)], "读取状态寄存器")
 
         if status_regs is None: return None # 读取失败
 
         status_data = {"mode": "未知", "run_status": "未知", "alarm_status": "无报警", "alarm_code": 0, "gv0_value": None}
         
-        mode_map = {0: "手动模式", 1: "自动模式", 2: "Modbus示教使能"}
-        status_data["mode"] = mode_map.get(status_regs[0], f"未知({status_regs[0]})")
+        status_data["mode"] = MODE_NAMES.get(status_regs[0], f"未知({status_regs[0]})")
         
-        run_map = {0: "停止", 1: "正在运行", 2: "暂停"}
-        status_data["run_status"] = run_map.get(status_regs[1], f"未知({status_regs[1]})")
+        status_data["run_status"] = RUN_STATUS_NAMES.get(status_regs[1], f"未知({status_regs[1]})")
 
         alarm_code = status_regs[2]
         status_data["alarm_code"] = alarm_code
         if alarm_code != 0:
-            desc = []
-            if alarm_code & 1: desc.append("急停报警")
-            if alarm_code & 2: desc.append("伺服报警")
-            if alarm_code & 4: desc.append("刹车异常")
-            if alarm_code & 8: desc.append("算法报警")
-            if alarm_code & 16: desc.append("编码器角度报警")
-            status_data["alarm_status"] = f"有报警 ({hex(alarm_code)}): " + ", ".join(desc)
+            status_data["alarm_status"] = f"有报警 ({hex(alarm_code)}): " + ALARM_DESCRIPTIONS[alarm_code & ALARM_MASK]
         
         if gv0_regs:
             status_data["gv0_value"] = utils.modbus_registers_to_float(gv0_regs)
-            
+
+        self._last_status = (time.monotonic(), dict(status_data))
         return status_data
 
+    def _read_run_state(self) -> Optional[Tuple[int, int]]:
+        """只读取运行状态 (561) 与报警 (562) 两个寄存器，返回 (运行状态码, 报警码)；读取失败返回 None。"""
+        regs = self._execute_read(561, 2, "读取运行状态")
+        return (regs[0], regs[1]) if regs is not None else None
+
     def wait_for_motion_completion(self, timeout=30, poll_interval=0.5) -> bool:
-        log.info(f"等待运动完成 (最长 {timeout}s)...")
+        """
+        等待运动启动并结束。查询间隔从 50ms 起逐次翻倍 (进入运行状态时重置)，最长为 poll_interval：
+        短距离运动结束后能尽快返回，长时间运动也不会持续高频占用连接。
+        """
+        log.info("等待运动完成 (最长 %ss)...", timeout)
         start_time = time.time()
-        
-        # 等待进入“运行中”
-        for _ in range(int(5 / poll_interval)):
-            status = self.get_status()
-            if not status or status["alarm_code"] != 0:
-                log.error(f"运动启动前或过程中检测到报警: {status.get('alarm_status', '未知') if status else '无法获取状态'}")
-                return False
-            if status["run_status"] == "正在运行": break
-            time.sleep(poll_interval)
-        else:
-            log.warning("机器人未在5秒内进入'运行中'状态，运动可能未启动。")
-            return False
+        delay = MIN_POLL_INTERVAL
+        started = False
 
-        # 等待返回“停止”
-        while time.time() - start_time < timeout:
-            status = self.get_status()
-            if not status or status["alarm_code"] != 0:
-                log.error(f"运动过程中检测到报警: {status.get('alarm_status', '未知') if status else '无法获取状态'}")
+        while True:
+            # 等待过程只关心运行/报警状态；连接断开时读取会经 connect() 重连，失败则返回 None
+            state = self._read_run_state()
+            if state is None or state[1] != 0:
+                if state is None:
+                    log.error("运动%s无法获取状态。", "过程中" if started else "启动前或过程中")
+                else:
+                    log.error("运动%s检测到报警: 有报警 (%#x): %s", "过程中" if started else "启动前或过程中",
+                              state[1], ALARM_DESCRIPTIONS[state[1] & ALARM_MASK])
                 return False
-            if status["run_status"] == "停止":
+
+            elapsed = time.time() - start_time
+            if not started:
+                # 等待进入“运行中”
+                if state[0] == 1:
+                    started = True
+                    # 进入运行状态后从最短间隔重新开始，短距离运动结束时能尽快检测到
+                    delay = MIN_POLL_INTERVAL
+                elif elapsed >= 5:
+                    log.warning("机器人未在5秒内进入'运行中'状态，运动可能未启动。")
+                    return False
+            elif state[0] == 0:
+                # 已返回“停止”
                 log.info("运动完成。")
                 return True
-            time.sleep(poll_interval)
-            
-        log.warning(f"运动超时 ({timeout}s)。")
-        return False
\ No newline at end of file
+
+            if elapsed >= timeout:
+                log.warning("运动超时 (%ss)。", timeout)
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, poll_interval)
@@ -1,24 +1,50 @@
 # backend/routes.py
 
 import logging
-from flask import Blueprint, request, jsonify, current_app
+import math
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, Response, request, jsonify, current_app
 from .robot_controller import RobotController
+from .status_monitor import StatusMonitor
 from .command_parser import CommandParser
-from .config import MOTION_CONFIG
 from .utils import get_local_ip
 from .config import load_config, save_config
 log = logging.getLogger(__name__)
 api_bp = Blueprint('api', __name__, url_prefix='/api')
+# 自然语言批次的 LLM 解析在此线程池中执行，使其与 Modbus 连接准备并行
+LLM_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="llm-parse")
 
 @api_bp.route('/status', methods=['GET'])
 def get_status_api():
-    robot: RobotController = current_app.config['robot_controller']
-    status_info = robot.get_status()
+    # 后台监视线程已有新鲜结果时直接返回内存中的状态，否则现场读取
+    status_info = current_app.config['status_monitor'].latest()
+    if status_info is None:
+        robot: RobotController = current_app.config['robot_controller']
+        status_info = robot.get_status()
     if status_info:
         return jsonify({"status": "success", "robot_status": status_info})
     else:
         return jsonify({"status": "error", "message": "无法获取机器人状态。"}), 503
 
+@api_bp.route('/events', methods=['GET'])
+def status_events_api():
+    """以 Server-Sent Events 推送机器人状态：连接时先发送当前状态，此后仅在状态变化时推送。"""
+    monitor: StatusMonitor = current_app.config['status_monitor']
+    dumps = current_app.json.dumps
+
+    def generate():
+        version, status_info = monitor.wait_for_change(-1, timeout=0)
+        yield f"data: {dumps(status_info)}\n\n"
+        while True:
+            new_version, status_info = monitor.wait_for_change(version, timeout=15)
+            if new_version == version:
+                yield ": keepalive\n\n"  # 注释行，防止代理或浏览器因长时间无数据断开连接
+                continue
+            version = new_version
+            yield f"data: {dumps(status_info)}\n\n"
+
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
 @api_bp.route('/server_info', methods=['GET'])
 def get_server_info_api():
     return jsonify({
@@ -37,37 +63,61 @@ def handle_command_api():
     if not command_text:
         return jsonify({"status": "error", "message": "指令不能为空。"}), 400
 
-    log.info(f"收到指令批次:\n{command_text}")
+    log.info("收到指令批次:\n%s", command_text)
     
-    # --- 基础连接和模式设置 ---
-    if not robot.connect():
-        return jsonify({"status": "error", "message": "无法连接到机器人。"}), 503
-    if not robot.set_auto_mode():
-        return jsonify({"status": "error", "message": "无法切换机器人到自动模式。"}), 503
-
     # --- 阶段1 & 2: 双模解析 ---
     is_strict_format_batch = True
     strict_commands_list = []
-    known_strict_prefixes = ["AUTO_MODE", "SET_SPEED", "MOVE", "GO_HOME", "PAUSE_MOVE", "CONTINUE_MOVE", "STOP_MOVE", "MONITOR", "TEST_WRITE_GV0"]
 
     for line in command_text.split('\n'):
         line = line.strip()
         if not line: continue
         
         normalized = parser.normalize_strict_command(line)
-        if any(normalized.startswith(prefix) for prefix in known_strict_prefixes):
+        # 规范化后的动词能在分派表中查到，即为严格格式
+        if normalized.partition(' ')[0] in STRICT_COMMAND_HANDLERS:
             strict_commands_list.append({'type': 'STRICT', 'line': line, 'normalized': normalized})
         else:
             is_strict_format_batch = False
             break # 只要有一行不符合，就整体用LLM
 
+    if is_strict_format_batch and all(cmd['normalized'] == 'MONITOR' for cmd in strict_commands_list):
+        # 只查询状态的批次 (前端的“刷新状态”)：不切换自动模式，也无需逐条执行，直接返回当前状态
+        robot_status = robot.get_status()
+        if robot_status is None:
+            return jsonify({"status": "error", "message": "无法连接到机器人。"}), 503
+        return jsonify({
+            "status": "success",
+            "message": "指令批次处理完成。",
+            "detailed_results": [{"command": cmd['line'], "status": "success", "message": "指令执行成功。"} for cmd in strict_commands_list],
+            "motion_started": False,
+            "robot_status": robot_status
+        })
+
     commands_to_execute = []
+    llm_future = None
     if is_strict_format_batch:
         log.info("所有指令均符合严格格式，按严格模式处理。")
         commands_to_execute = strict_commands_list
     else:
         log.info("检测到非严格格式指令，使用 LLM 解析整个批次。")
-        llm_result = parser.parse_with_llm(command_text)
+        # LLM 解析耗时秒级，交给后台线程，与下面的连接和模式设置并行进行
+        llm_future = LLM_EXECUTOR.submit(parser.parse_with_llm, command_text)
+
+    # --- 基础连接和模式设置 ---
+    setup_error = None
+    if not robot.connect():
+        setup_error = "无法连接到机器人。"
+    elif not robot.set_auto_mode():
+        setup_error = "无法切换机器人到自动模式。"
+    if setup_error:
+        # 批次不再执行：尚未开始的 LLM 解析直接取消；已在进行中的无法中断，其结果被丢弃
+        if llm_future is not None and not llm_future.cancel():
+            log.info("机器人准备失败，丢弃进行中的 LLM 解析结果。")
+        return jsonify({"status": "error", "message": setup_error}), 503
+
+    if llm_future is not None:
+        llm_result = llm_future.result()
         if llm_result.get("error"):
             return jsonify({"status": "error", "message": f"LLM解析失败: {llm_result.get('message')}"}), 400
         commands_to_execute = llm_result.get("commands", [])
@@ -89,13 +139,13 @@ def handle_command_api():
             else: # LLM parsed
                 success, motion_triggered = execute_llm_command(robot, cmd_data)
         except Exception as e:
-            log.error(f"执行指令 '{original_line}' 时发生内部异常: {e}", exc_info=True)
+            log.error("执行指令 '%s' 时发生内部异常: %s", original_line, e, exc_info=True)
             success = False
 
         if motion_triggered:
             batch_motion_started = True
             if success: # 只有启动成功才等待
-                log.info(f"等待运动完成 (来自: {original_line})...")
+                log.info("等待运动完成 (来自: %s)...", original_line)
                 success = robot.wait_for_motion_completion()
         
         msg_status = "success" if success else "error"
@@ -113,50 +163,158 @@ def handle_command_api():
         "robot_status": robot.get_status()
     })
 
+@api_bp.route('/command/move_and_start', methods=['POST'])
+def move_and_start_api():
+    """
+    单次请求完成“设置速度 + 增量移动 + 启动运动”。
+    请求体: {"axis": "J1" 或 "X", "value": <float>, "speed": <float, 可选>}
+    """
+    robot: RobotController = current_app.config['robot_controller']
+
+    data = request.get_json(silent=True) or {}
+    axis = str(data.get('axis', '')).strip().upper()
+    try:
+        value = float(data.get('value', data.get('angle')))
+        speed = float(data['speed']) if data.get('speed') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": "运动参数必须是数字。"}), 400
+    # float() 接受 "nan"、"inf"，这类值不能写入偏移量或速度寄存器
+    if not math.isfinite(value) or (speed is not None and not math.isfinite(speed)):
+        return jsonify({"status": "error", "message": "运动参数必须是有限的数字。"}), 400
+
+    if axis.startswith("J") and axis[1:].isdigit() and 1 <= int(axis[1:]) <= 6:
+        offsets, coordinate_type = {int(axis[1:]): value}, 'joint'
+    elif axis in ("X", "Y", "Z", "A", "B", "C"):
+        offsets, coordinate_type = {axis: value}, 'base_coords'
+    else:
+        return jsonify({"status": "error", "message": f"无效的轴: {axis or '(空)'}"}), 400
+
+    if not robot.connect():
+        return jsonify({"status": "error", "message": "无法连接到机器人。"}), 503
+    if not robot.set_auto_mode():
+        return jsonify({"status": "error", "message": "无法切换机器人到自动模式。"}), 503
+
+    success = robot.start_incremental_move(offsets, coordinate_type, speed=speed)
+    if success:
+        success = robot.wait_for_motion_completion()
+
+    return jsonify({
+        "status": "success" if success else "error",
+        "message": f"指令执行{'成功' if success else '失败'}。",
+        "motion_started": True,
+        "robot_status": robot.get_status()
+    })
+
+@api_bp.route('/trajectory', methods=['POST'])
+def trajectory_api():
+    """
+    依次运动经过一组基坐标位姿。
+    请求体: {"points": [[x, y, z, a, b, c], ...], "speed": <float, 可选>}
+    点位经 GV0 起的全局变量下发，会覆盖 GV0 测试值。
+    """
+    robot: RobotController = current_app.config['robot_controller']
+
+    data = request.get_json(silent=True) or {}
+    points = data.get('points')
+    if not isinstance(points, list) or not points:
+        return jsonify({"status": "error", "message": "轨迹点不能为空。"}), 400
+    # 每个点必须是恰好 6 个数字的列表；字符串等可迭代对象不算 (bool 也不算数字)
+    if not all(isinstance(point, list) and len(point) == 6 and
+               all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in point)
+               for point in points):
+        return jsonify({"status": "error", "message": "每个轨迹点必须是包含 X, Y, Z, A, B, C 六个数字的列表。"}), 400
+    poses = [[float(v) for v in point] for point in points]
+    try:
+        speed = float(data['speed']) if data.get('speed') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": "速度必须是数字。"}), 400
+
+    if not robot.connect():
+        return jsonify({"status": "error", "message": "无法连接到机器人。"}), 503
+    if not robot.set_auto_mode():
+        return jsonify({"status": "error", "message": "无法切换机器人到自动模式。"}), 503
+    if not robot.upload_trajectory(poses):
+        return jsonify({"status": "error", "message": "轨迹点下发失败。"}), 400
+
+    response_messages = []
+    overall_status = "success"
+    for point_id in range(1, len(poses) + 1):
+        success = robot.move_to_temp_point(point_id, speed=speed)
+        if success:
+            success = robot.wait_for_motion_completion()
+        response_messages.append({
+            "command": f"运动至轨迹点 {point_id}",
+            "status": "success" if success else "error",
+            "message": f"指令执行{'成功' if success else '失败'}。"
+        })
+        if not success:
+            overall_status = "error"
+            break
+
+    return jsonify({
+        "status": overall_status,
+        "message": "轨迹执行完成。" if overall_status == "success" else "轨迹执行中存在错误或中断。",
+        "detailed_results": response_messages,
+        "motion_started": True,
+        "robot_status": robot.get_status()
+    })
+
+# LLM 指令的分派表：command_type -> handler(robot, 参数字典)，返回 (执行是否成功, 是否触发运动)
+LLM_COMMAND_HANDLERS = {
+    "SET_SPEED": lambda robot, params: (robot.set_speed(params.get("speed_value")), False),
+    "MOVE_JOINT": lambda robot, params: (robot.start_incremental_move({params.get("axis_id"): params.get("angle")}, 'joint'), True),
+    "MOVE_BASE": lambda robot, params: (robot.start_incremental_move({params.get("axis_name"): params.get("value")}, 'base_coords'), True),
+    "GO_HOME_ALL": lambda robot, params: (robot.go_home(), True),
+    "GO_HOME_JOINT": lambda robot, params: (robot.go_home(axis_id=params.get("axis_id")), True),
+    "PAUSE_MOVE": lambda robot, params: (robot.pause_move(), False),
+    "CONTINUE_MOVE": lambda robot, params: (robot.continue_move(), False),
+    "STOP_MOVE": lambda robot, params: (robot.stop_move(), False),
+    "MONITOR": lambda robot, params: (True, False),
+    "TEST_WRITE_GV0": lambda robot, params: (robot.write_gv0_test(params.get("value")), False),
+}
+
 def execute_llm_command(robot: RobotController, cmd_data: dict) -> (bool, bool):
     """执行LLM解析出的单条指令，返回 (执行是否成功, 是否触发运动)"""
     cmd_type = cmd_data.get("command_type")
-    params = cmd_data.get("parameters", {})
-    
-    if cmd_type == "SET_SPEED": return robot.set_speed(params.get("speed_value")), False
-    if cmd_type == "MOVE_JOINT": return robot.start_incremental_move({params.get("axis_id"): params.get("angle")}, 'joint'), True
-    if cmd_type == "MOVE_BASE": return robot.start_incremental_move({params.get("axis_name"): params.get("value")}, 'base_coords'), True
-    if cmd_type == "GO_HOME_ALL": return robot.go_home(), True
-    if cmd_type == "GO_HOME_JOINT": return robot.go_home(axis_id=params.get("axis_id")), True
-    if cmd_type == "PAUSE_MOVE": return robot.pause_move(), False
-    if cmd_type == "CONTINUE_MOVE": return robot.continue_move(), False
-    if cmd_type == "STOP_MOVE": return robot.stop_move(), False
-    if cmd_type == "MONITOR": return True, False
-    if cmd_type == "TEST_WRITE_GV0": return robot.write_gv0_test(params.get("value")), False
-        
-    log.warning(f"接收到未知的LLM指令类型: {cmd_type}")
-    return False, False
+    handler = LLM_COMMAND_HANDLERS.get(cmd_type)
+    if handler is None:
+        log.warning("接收到未知的LLM指令类型: %s", cmd_type)
+        return False, False
+    return handler(robot, cmd_data.get("parameters", {}))
+
+def _strict_set_speed(robot: RobotController, args: str) -> (bool, bool):
+    speed = float(args) if args else robot.default_speed
+    return robot.set_speed(speed), False
+
+def _strict_move(robot: RobotController, args: str) -> (bool, bool):
+    axis_part, _, value = args.partition(' ')
+    value = float(value)
+    if axis_part.startswith("J"):
+        return robot.start_incremental_move({int(axis_part[1:]): value}, 'joint'), True
+    return robot.start_incremental_move({axis_part: value}, 'base_coords'), True
+
+# 严格格式指令的分派表：动词 -> handler(robot, 参数文本)，返回 (执行是否成功, 是否触发运动)
+STRICT_COMMAND_HANDLERS = {
+    "AUTO_MODE": lambda robot, args: (robot.set_auto_mode(), False),
+    "SET_SPEED": _strict_set_speed,
+    "MOVE": _strict_move,
+    "GO_HOME_ALL": lambda robot, args: (robot.go_home(), True),
+    "GO_HOME_J": lambda robot, args: (robot.go_home(axis_id=int(args)), True),
+    "PAUSE_MOVE": lambda robot, args: (robot.pause_move(), False),
+    "CONTINUE_MOVE": lambda robot, args: (robot.continue_move(), False),
+    "STOP_MOVE": lambda robot, args: (robot.stop_move(), False),
+    "MONITOR": lambda robot, args: (True, False),
+    "TEST_WRITE_GV0": lambda robot, args: (robot.write_gv0_test(float(args)), False),
+}
 
 def execute_strict_command(robot: RobotController, normalized_cmd: str) -> (bool, bool):
     """执行严格格式的单条指令，返回 (执行是否成功, 是否触发运动)"""
-    parts = normalized_cmd.split()
-    cmd_type = parts[0]
-    
-    if cmd_type == "AUTO_MODE": return robot.set_auto_mode(), False
-    if cmd_type == "SET_SPEED":
-        speed = float(parts[1]) if len(parts) > 1 and parts[1] else MOTION_CONFIG.get('default_speed', 100.0)
-        return robot.set_speed(speed), False
-    if cmd_type == "MOVE":
-        axis_part, value = parts[1], float(parts[2])
-        if axis_part.startswith("J"):
-            return robot.start_incremental_move({int(axis_part[1:]): value}, 'joint'), True
-        else:
-            return robot.start_incremental_move({axis_part: value}, 'base_coords'), True
-    if cmd_type == "GO_HOME_ALL": return robot.go_home(), True
-    if cmd_type == "GO_HOME_J": return robot.go_home(axis_id=int(parts[1])), True
-    if cmd_type == "PAUSE_MOVE": return robot.pause_move(), False
-    if cmd_type == "CONTINUE_MOVE": return robot.continue_move(), False
-    if cmd_type == "STOP_MOVE": return robot.stop_move(), False
-    if cmd_type == "MONITOR": return True, False
-    if cmd_type == "TEST_WRITE_GV0": return robot.write_gv0_test(float(parts[1])), False
-        
-    log.warning(f"接收到未知的严格指令类型: {cmd_type}")
-    return False, False
+    cmd_type, _, args = normalized_cmd.partition(' ')
+    handler = STRICT_COMMAND_HANDLERS.get(cmd_type)
+    if handler is None:
+        log.warning("接收到未知的严格指令类型: %s", cmd_type)
+        return False, False
+    return handler(robot, args.strip())
 
 @api_bp.route('/settings', methods=['GET'])
 def get_settings():
@@ -204,11 +362,21 @@ def update_settings():
         motion_cfg = updated_config.get('motion', {})
         llm_cfg = updated_config.get('llm_config', {})
 
-        # 重新初始化控制器和解析器
-        current_app.config['robot_controller'] = RobotController(robot_cfg, motion_cfg)
-        current_app.config['command_parser'] = CommandParser(llm_cfg)
+        # 连接参数未变时原地更新运动配置，保留现有的 TCP 连接；否则关闭旧连接并重新创建控制器
+        robot: RobotController = current_app.config['robot_controller']
+        if robot.uses_connection(robot_cfg):
+            robot.apply_motion_config(motion_cfg)
+        else:
+            # 持旧控制器的锁完成替换：进行中的多步操作 (如增量运动) 先执行完，
+            # 之后仍持有旧控制器的请求会因其已关闭而失败，不会再打开新的连接
+            with robot.lock:
+                robot.close()
+                current_app.config['robot_controller'] = RobotController(robot_cfg, motion_cfg)
+        # LLM 配置未变时保留解析器，连同已创建的客户端和解析结果缓存
+        if current_app.config['command_parser'].llm_config != llm_cfg:
+            current_app.config['command_parser'] = CommandParser(llm_cfg)
         
-        log.info("RobotController 和 CommandParser 已使用新配置重新初始化。")
+        log.info("RobotController 和 CommandParser 已应用新配置。")
         return jsonify({"status": "success", "message": "配置已成功更新并应用。"})
 
     except Exception as e:
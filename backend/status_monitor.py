@@ -0,0 +1,77 @@
+# backend/status_monitor.py
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+# 机器人不可达时两次重连尝试之间的最长间隔 (秒)
+MAX_RETRY_INTERVAL = 10.0
+
+class StatusMonitor:
+    """
+    后台线程定时读取机器人状态并保存在内存中。
+    /status 直接返回最新结果，/events 在状态变化时推送给订阅者，
+    无论有多少前端在观察，Modbus 上都只有这一路状态轮询。
+    """
+    def __init__(self, get_robot: Callable[[], Any], interval: float = 0.5):
+        # 以回调获取控制器：配置更新后 app.config 中的控制器实例会被替换
+        self._get_robot = get_robot
+        self.interval = interval
+        self._condition = threading.Condition()
+        self._latest: Optional[Dict[str, Any]] = None
+        self._updated_at = 0.0
+        self._version = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="status-monitor", daemon=True)
+        self._thread.start()
+        log.info(f"状态监视线程已启动，轮询间隔: {self.interval}s")
+
+    def _run(self):
+        failing = False
+        delay = self.interval
+        while True:
+            try:
+                # 非阻塞读取：指令线程占用连接时不排队，避免拖慢指令的写入序列
+                result = self._get_robot().poll_status()
+                failing = False
+            except Exception as e:
+                # 同一故障会在每次轮询时重复出现：只有首次记录完整堆栈，之后只记录异常信息
+                log.error("后台读取机器人状态时发生异常: %s", e, exc_info=not failing)
+                failing = True
+                result = (time.monotonic(), None)
+            if result is None:
+                # 连接正被占用：保留上一次的状态及其时间戳，占用时间较长时 latest() 会按过期处理
+                time.sleep(self.interval)
+                continue
+            read_at, status = result
+            with self._condition:
+                self._updated_at = read_at
+                if status != self._latest:
+                    self._latest = status
+                    self._version += 1
+                    self._condition.notify_all()
+            # 机器人不可达时每次轮询都要等待连接超时并占用控制器锁：逐次加倍间隔 (最长 MAX_RETRY_INTERVAL)，
+            # 恢复后立即回到正常间隔
+            delay = self.interval if status is not None else min(delay * 2, MAX_RETRY_INTERVAL)
+            time.sleep(delay)
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """返回最近一次的状态；监视线程未运行或结果已过期时返回 None。"""
+        with self._condition:
+            if self._latest is None or time.monotonic() - self._updated_at > 3 * self.interval:
+                return None
+            return dict(self._latest)
+
+    def wait_for_change(self, version: int, timeout: float) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """阻塞直到状态版本号不同于 version 或超时，返回 (当前版本号, 当前状态)。"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._version != version, timeout=timeout)
+            latest = dict(self._latest) if self._latest is not None else None
+            return self._version, latest
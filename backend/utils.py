@@ -3,25 +3,53 @@
 import os
 import sys
 import struct
+import functools
 import socket
+import time
 import logging
-from typing import List
+from typing import List, Optional, Sequence, Tuple
 
 log = logging.getLogger(__name__)
 
+# 响应类型 -> 成功判定函数；同一类型的响应只需探测一次可用的方法 (不同 pymodbus 版本接口不同)
+_RESPONSE_OK_CHECKS = {}
+
+# 预编译的 struct 格式，避免每次转换都重新解析格式字符串
+_FLOAT = struct.Struct('>f')
+_WORDS = struct.Struct('>HH')
+# Modbus TCP 读保持寄存器请求帧与 MBAP 响应头
+_READ_REQUEST_FRAME = struct.Struct('>HHHBBHH')
+MBAP_HEADER = struct.Struct('>HHHB')
+
+# 本机IP的缓存时长：切换网络后最多这么久即可在服务器信息中看到新地址
+LOCAL_IP_CACHE_SECONDS = 60.0
+# 最近一次检测到的本机IP: (时间戳, IP)
+_local_ip_cache: Optional[Tuple[float, str]] = None
+
 def is_frozen() -> bool:
     """ 检查程序是否被 PyInstaller 打包 """
     return getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS')
 
+@functools.lru_cache(maxsize=None)
 def get_project_root() -> str:
-    """ 获取项目的根目录 """
+    """ 获取项目的根目录 (运行期间不会变化，只计算一次) """
     if is_frozen():
         return os.path.dirname(sys.executable)
     else:
         return os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 
 def get_local_ip() -> str:
-    """ 尝试获取用于与外部通信的本机局域网IP地址 """
+    """ 尝试获取用于与外部通信的本机局域网IP地址 (结果缓存 LOCAL_IP_CACHE_SECONDS 秒) """
+    global _local_ip_cache
+    cached = _local_ip_cache
+    now = time.monotonic()
+    if cached is not None and now - cached[0] < LOCAL_IP_CACHE_SECONDS:
+        return cached[1]
+    ip = _detect_local_ip()
+    _local_ip_cache = (now, ip)
+    return ip
+
+def _detect_local_ip() -> str:
     s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     s.settimeout(0.1)
     try:
@@ -39,42 +67,140 @@ def get_local_ip() -> str:
         s.close()
     return ip
 
+def enable_tcp_keepalive(sock, idle: int = 30, interval: int = 10, count: int = 3) -> None:
+    """
+    为TCP套接字开启 keep-alive，以便尽早发现被对端或NAT静默断开的连接。
+    TCP_KEEPIDLE 等选项并非所有平台都支持，不支持时只开启 SO_KEEPALIVE。
+    """
+    if sock is None:
+        return
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        for option_name, value in (("TCP_KEEPIDLE", idle), ("TCP_KEEPINTVL", interval), ("TCP_KEEPCNT", count)):
+            option = getattr(socket, option_name, None)
+            if option is not None:
+                sock.setsockopt(socket.IPPROTO_TCP, option, value)
+    except OSError as e:
+        log.warning(f"设置TCP keep-alive失败: {e}")
+
+def _pack_words(float_value: float) -> Tuple[int, int]:
+    """ 将浮点数打包为 (低位字, 高位字) """
+    # 先按大端字节序打包成4字节，再拆成 (高位字, 低位字)
+    high_word, low_word = _WORDS.unpack(_FLOAT.pack(float_value))
+    return low_word, high_word
+
+# 速度、保持点等重复值只需计算一次。注意 0.0 与 -0.0 相等且哈希相同，
+# 会共用同一个缓存项，零值必须绕过缓存 (见 float_to_modbus_registers)
+_pack_float = functools.lru_cache(maxsize=512)(_pack_words)
+
+@functools.lru_cache(maxsize=512)
+def _unpack_float(low_word: int, high_word: int) -> float:
+    """
+    将 (低位字, 高位字) 还原为浮点数；状态轮询反复读到的同一 GV0 值只需解码一次。
+    缓存键是两个整数寄存器值，与位模式一一对应，-0.0 等特殊值不会与其他值混淆。
+    """
+    # 按大端字节序重新组合
+    return _FLOAT.unpack(_WORDS.pack(high_word, low_word))[0]
+
+def enable_tcp_nodelay(sock) -> None:
+    """
+    关闭 Nagle 算法。Modbus 的请求帧都很小，且发送后立即等待响应，
+    Nagle 的合并等待只会给每次“写后读”增加延迟。
+    """
+    if sock is None:
+        return
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except OSError as e:
+        log.warning(f"设置TCP_NODELAY失败: {e}")
+
 def float_to_modbus_registers(float_value: float) -> List[int]:
     """
     将32位浮点数转换为两个16位Modbus寄存器值 (遵循小端模式)
     """
-    # 先按大端字节序打包成4字节
-    packed_bytes = struct.pack('>f', float_value)
     # 按小端模式，低位字在前，高位字在后
-    # packed_bytes[2:4] 是低位字，packed_bytes[0:2] 是高位字
-    low_word = struct.unpack('>H', packed_bytes[2:4])[0]
-    high_word = struct.unpack('>H', packed_bytes[0:2])[0]
-    return [low_word, high_word]
+    value = float(float_value)
+    if value == 0.0:
+        # 0.0 与 -0.0 在缓存中是同一个键，直接打包，输出不随调用历史变化
+        return list(_pack_words(value))
+    return list(_pack_float(value))
 
 def modbus_registers_to_float(registers: List[int]) -> float:
     """
     将两个16位Modbus寄存器值转换为32位浮点数 (遵循小端模式)
     """
     if len(registers) != 2:
-        log.error(f"需要2个寄存器来转为浮点数，但收到了 {len(registers)} 个。")
+        log.error("需要2个寄存器来转为浮点数，但收到了 %d 个。", len(registers))
         return 0.0
     # registers[0] 是低位字, registers[1] 是高位字
     low_word, high_word = registers
-    # 按大端字节序重新组合
-    packed_bytes = struct.pack('>HH', high_word, low_word)
-    return struct.unpack('>f', packed_bytes)[0]
+    # 空闲时 GV0 等寄存器通常为全零，直接返回 0.0
+    if low_word == 0 and high_word == 0:
+        return 0.0
+    return _unpack_float(low_word, high_word)
 
-def is_modbus_response_ok(response) -> bool:
-    """ 通用检查Modbus响应是否成功 """
-    if response is None:
-        return False
+@functools.lru_cache(maxsize=32)
+def _bulk_structs(count: int) -> Tuple[struct.Struct, struct.Struct]:
+    """ 按浮点数个数缓存预编译的 (浮点数组, 寄存器数组) 格式，如偏移量固定为6个 """
+    return struct.Struct(f'>{count}f'), struct.Struct(f'>{count * 2}H')
+
+def floats_to_modbus_registers(float_values: Sequence[float]) -> List[int]:
+    """
+    批量将多个32位浮点数转换为Modbus寄存器值 (每个浮点数占两个寄存器，遵循小端模式)
+    """
+    float_struct, words_struct = _bulk_structs(len(float_values))
+    words = words_struct.unpack(float_struct.pack(*float_values))
+    registers = list(words)
+    # 大端打包后每对为 (高位字, 低位字)，交换为低位字在前
+    registers[0::2], registers[1::2] = words[1::2], words[0::2]
+    return registers
+
+def build_read_holding_registers_frame(transaction_id: int, unit_id: int, address: int, count: int) -> bytes:
+    """ 构造一个完整的 Modbus TCP (MBAP头 + PDU) 03H 读保持寄存器请求帧 """
+    # MBAP: 事务ID, 协议ID=0, 后续长度=6, 单元ID；PDU: 功能码, 起始地址, 数量
+    return _READ_REQUEST_FRAME.pack(transaction_id, 0, 6, unit_id, 0x03, address, count)
+
+def parse_read_holding_registers_pdu(pdu: bytes) -> Optional[List[int]]:
+    """
+    解析 03H 读保持寄存器响应的 PDU (功能码 + 字节数 + 数据)。
+    从站返回异常响应 (0x83) 时返回 None；帧格式不符时抛出 ValueError。
+    """
+    if len(pdu) == 2 and pdu[0] == 0x83:
+        log.error("读寄存器失败，异常码: %s", pdu[1])
+        return None
+    if len(pdu) < 2 or pdu[0] != 0x03 or len(pdu) != 2 + pdu[1]:
+        raise ValueError(f"非预期的读寄存器响应: {pdu.hex()}")
+    byte_count = pdu[1]
+    return list(struct.unpack(f'>{byte_count // 2}H', pdu[2:2 + byte_count]))
+
+def recv_exact(sock, size: int) -> bytes:
+    """ 从套接字读取恰好 size 个字节 """
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            raise ConnectionError("连接已被对端关闭")
+        buffer += chunk
+    return bytes(buffer)
+
+def _response_ok_check(response):
+    """ 根据一个响应实例确定该类型的成功判定函数 """
     # isError() 是 pymodbus 3.x 的方法
-    if hasattr(response, 'isError') and callable(response.isError):
-        return not response.isError()
+    if callable(getattr(response, 'isError', None)):
+        return lambda r: not r.isError()
     # is_exception() 是旧版本的方法
-    if hasattr(response, 'is_exception') and callable(response.is_exception):
-        return not response.is_exception()
+    if callable(getattr(response, 'is_exception', None)):
+        return lambda r: not r.is_exception()
     # 如果没有错误检查方法，但有寄存器，也认为是成功的
     if hasattr(response, 'registers'):
-        return True
-    return False
\ No newline at end of file
+        return lambda r: True
+    return lambda r: False
+
+def is_modbus_response_ok(response) -> bool:
+    """ 通用检查Modbus响应是否成功 """
+    if response is None:
+        return False
+    check = _RESPONSE_OK_CHECKS.get(type(response))
+    if check is None:
+        check = _RESPONSE_OK_CHECKS[type(response)] = _response_ok_check(response)
+    return check(response)